@@ -0,0 +1,217 @@
+/**
+ * Archive search.
+ * Loads the settings (/search/index.json), then only the prefix shards needed by the query
+ * and the doc chunks holding the displayed results.
+ * Tokenisation must stay in sync with tokenize() in scripts/postprocess-archive.py.
+ */
+(function () {
+  const INDEX_URL = '/search/index.json';
+  const SHARDS_BASE_PATH = '/search/shards/';
+  const DOCS_BASE_PATH = '/search/docs/';
+  const MAX_RESULTS = 50;
+  const form = document.getElementById('archive-search-form');
+  const input = document.getElementById('archive-search-input');
+  const status = document.getElementById('archive-search-status');
+  const results = document.getElementById('archive-search-results');
+  const shardPromises = new Map();
+  const docChunkPromises = new Map();
+  let manifestPromise = null;
+  let searchSeq = 0;
+
+  if (!form || !input || !status || !results) {
+    return;
+  }
+
+  const fetchJson = (url) =>
+    fetch(url, { headers: { Accept: 'application/json' } }).then((response) => {
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      return response.json();
+    });
+
+  const loadManifest = () => {
+    if (!manifestPromise) {
+      manifestPromise = fetchJson(INDEX_URL).then((payload) => ({
+        prefixLength: payload?.prefixLength || 2,
+        minTokenLength: payload?.minTokenLength || 2,
+        stopwords: new Set(Array.isArray(payload?.stopwords) ? payload.stopwords : []),
+        shards: new Set(Array.isArray(payload?.shards) ? payload.shards : []),
+        docsPerChunk: payload?.docsPerChunk || 100,
+      }));
+    }
+    return manifestPromise;
+  };
+
+  const loadShard = (key, manifest) => {
+    if (!manifest.shards.has(key)) {
+      return Promise.resolve({});
+    }
+    if (!shardPromises.has(key)) {
+      shardPromises.set(
+        key,
+        fetchJson(`${SHARDS_BASE_PATH}${encodeURIComponent(key)}.json`).catch(() => {
+          shardPromises.delete(key);
+          return {};
+        })
+      );
+    }
+    return shardPromises.get(key);
+  };
+
+  const loadDocChunk = (number) => {
+    if (!docChunkPromises.has(number)) {
+      docChunkPromises.set(
+        number,
+        fetchJson(`${DOCS_BASE_PATH}${number}.json`).catch(() => {
+          docChunkPromises.delete(number);
+          return [];
+        })
+      );
+    }
+    return docChunkPromises.get(number);
+  };
+
+  const loadDocs = (docIds, manifest) => {
+    const numbers = Array.from(new Set(docIds.map((docId) => Math.floor(docId / manifest.docsPerChunk))));
+    return Promise.all(numbers.map(loadDocChunk)).then((chunks) => {
+      const byNumber = new Map(numbers.map((number, index) => [number, chunks[index]]));
+      return docIds.map((docId) => {
+        const chunk = byNumber.get(Math.floor(docId / manifest.docsPerChunk)) || [];
+        return chunk[docId % manifest.docsPerChunk] || null;
+      });
+    });
+  };
+
+  const foldAccents = (value) =>
+    (value == null ? '' : value.toString())
+      .toLowerCase()
+      .replace(/œ/g, 'oe')
+      .replace(/æ/g, 'ae')
+      .normalize('NFKD')
+      .replace(/[\u0300-\u036f]/g, '');
+
+  const tokenize = (value, manifest) =>
+    (foldAccents(value).match(/[a-z0-9]+/g) || []).filter(
+      (token) => token.length >= manifest.minTokenLength && !manifest.stopwords.has(token)
+    );
+
+  // Every query word must match; the last one also matches as a prefix (search-as-you-type).
+  const lookup = (token, shard, isPrefix) => {
+    const scores = new Map();
+    Object.keys(shard).forEach((term) => {
+      if (term !== token && !(isPrefix && term.startsWith(token))) {
+        return;
+      }
+      shard[term].forEach(([docId, weight]) => {
+        scores.set(docId, (scores.get(docId) || 0) + (term === token ? weight : weight / 2));
+      });
+    });
+    return scores;
+  };
+
+  const render = (ranked, docs, query) => {
+    results.textContent = '';
+    docs.forEach((doc) => {
+      if (!doc) {
+        return;
+      }
+      const [url, title, snippet] = doc;
+      const item = document.createElement('li');
+      const link = document.createElement('a');
+      link.href = url;
+      link.textContent = title || url;
+      item.appendChild(link);
+      if (snippet) {
+        const text = document.createElement('p');
+        text.textContent = snippet;
+        item.appendChild(text);
+      }
+      results.appendChild(item);
+    });
+    if (!ranked.length) {
+      status.textContent = `Aucun résultat pour « ${query} ».`;
+    } else {
+      status.textContent = `${ranked.length} page${ranked.length > 1 ? 's' : ''} trouvée${ranked.length > 1 ? 's' : ''}.`;
+    }
+  };
+
+  const runSearch = (query) => {
+    const seq = ++searchSeq;
+    loadManifest()
+      .then((manifest) => {
+        const tokens = Array.from(new Set(tokenize(query, manifest)));
+        if (!tokens.length) {
+          results.textContent = '';
+          status.textContent = '';
+          return null;
+        }
+        const keys = Array.from(new Set(tokens.map((token) => token.slice(0, manifest.prefixLength))));
+        return Promise.all(keys.map((key) => loadShard(key, manifest))).then((loaded) => {
+          if (seq !== searchSeq) {
+            return;
+          }
+          const shards = new Map(keys.map((key, index) => [key, loaded[index]]));
+          let combined = null;
+          tokens.forEach((token, index) => {
+            const shard = shards.get(token.slice(0, manifest.prefixLength)) || {};
+            const scores = lookup(token, shard, index === tokens.length - 1);
+            if (combined === null) {
+              combined = scores;
+              return;
+            }
+            const next = new Map();
+            combined.forEach((score, docId) => {
+              if (scores.has(docId)) {
+                next.set(docId, score + scores.get(docId));
+              }
+            });
+            combined = next;
+          });
+          const ranked = Array.from(combined || []).sort((a, b) => b[1] - a[1] || a[0] - b[0]);
+          const shown = ranked.slice(0, MAX_RESULTS).map(([docId]) => docId);
+          return loadDocs(shown, manifest).then((docs) => {
+            if (seq === searchSeq) {
+              render(ranked, docs, query.trim());
+            }
+          });
+        });
+      })
+      .catch(() => {
+        if (seq === searchSeq) {
+          status.textContent = "L'index de recherche est indisponible.";
+        }
+      });
+  };
+
+  const syncUrl = (query) => {
+    const url = new URL(window.location.href);
+    if (query) {
+      url.searchParams.set('q', query);
+    } else {
+      url.searchParams.delete('q');
+    }
+    window.history.replaceState(null, '', url);
+  };
+
+  let debounceTimer = null;
+  input.addEventListener('input', () => {
+    window.clearTimeout(debounceTimer);
+    debounceTimer = window.setTimeout(() => {
+      syncUrl(input.value.trim());
+      runSearch(input.value);
+    }, 150);
+  });
+
+  form.addEventListener('submit', (event) => {
+    event.preventDefault();
+    syncUrl(input.value.trim());
+    runSearch(input.value);
+  });
+
+  const initialQuery = new URLSearchParams(window.location.search).get('q');
+  if (initialQuery) {
+    input.value = initialQuery;
+    runSearch(initialQuery);
+  }
+})();
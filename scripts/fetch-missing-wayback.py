@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 import gzip
+import json
 import re
 import sys
 import time
-from http.client import RemoteDisconnected
+from http.client import IncompleteRead, RemoteDisconnected
 from pathlib import Path
 from typing import Iterable
 from urllib.error import HTTPError, URLError
@@ -34,8 +35,13 @@ DIRECT_FALLBACK_HOSTS = {
 }
 
 
+# Server Content-Length of every asset we wrote (absent when gzip-encoded), keyed by
+# archive-relative path. verify-archive.py compares file sizes against it.
+CONTENT_LENGTHS_NAME = "wayback-content-lengths.json"
+
+
 def usage() -> None:
-    print("Usage: fetch-missing-wayback.py <archive_root> [missing_file] [delay_seconds]", file=sys.stderr)
+    print("Usage: fetch-missing-wayback.py [--force] <archive_root> [missing_file] [delay_seconds]", file=sys.stderr)
 
 
 def normalize_path(path: str) -> str:
@@ -66,7 +72,27 @@ def load_missing(path: Path) -> Iterable[str]:
     return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
 
 
-def download(url: str, target: Path, delay: float, retries: int = 3) -> bool:
+def load_content_lengths(root: Path) -> dict[str, int]:
+    try:
+        data = json.loads((root / CONTENT_LENGTHS_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {rel: length for rel, length in data.items() if isinstance(length, int)}
+
+
+def save_content_lengths(root: Path, lengths: dict[str, int]) -> None:
+    path = root / CONTENT_LENGTHS_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(lengths, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def download(url: str, target: Path, delay: float, retries: int = 3) -> tuple[bool, int | None]:
+    # Returns (success, Content-Length or None when unknown/gzip-encoded). The payload
+    # goes to a temp file first so an interrupted transfer never leaves a truncated
+    # asset at `target` that later runs would skip as "already present".
     normalized_url = normalize_url(url)
     # web.archive.org HTTPS is occasionally unavailable from some networks; HTTP works.
     if normalized_url.startswith("https://web.archive.org/"):
@@ -86,36 +112,54 @@ def download(url: str, target: Path, delay: float, retries: int = 3) -> bool:
             )
             with urlopen(req, timeout=30) as resp:
                 if resp.status >= 400:
-                    return False
+                    return False, None
+                gzipped = (resp.headers.get("Content-Encoding") or "").lower() == "gzip"
+                # With gzip, Content-Length is the compressed size: not comparable.
+                expected = None if gzipped else parse_content_length(resp.headers.get("Content-Length"))
                 target.parent.mkdir(parents=True, exist_ok=True)
-                with open(target, "wb") as f:
-                    stream = resp
-                    if (resp.headers.get("Content-Encoding") or "").lower() == "gzip":
-                        stream = gzip.GzipFile(fileobj=resp)
-                    while True:
-                        chunk = stream.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
+                tmp = target.with_name(target.name + ".tmp")
+                written = 0
+                try:
+                    with open(tmp, "wb") as f:
+                        stream = gzip.GzipFile(fileobj=resp) if gzipped else resp
+                        while True:
+                            chunk = stream.read(8192)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            written += len(chunk)
+                    if expected is not None and written != expected:
+                        raise IncompleteRead(b"", expected - written)
+                    tmp.replace(target)
+                finally:
+                    tmp.unlink(missing_ok=True)
             if delay:
                 time.sleep(delay)
-            return True
+            return True, expected
         except HTTPError as exc:
             if exc.code in (429, 500, 502, 503, 504) and attempt < retries:
                 time.sleep(delay + attempt)
                 continue
-            return False
+            return False, None
         except URLError:
             if attempt < retries:
                 time.sleep(delay + attempt)
                 continue
-            return False
-        except (ConnectionResetError, TimeoutError, RemoteDisconnected):
+            return False, None
+        except (ConnectionResetError, TimeoutError, RemoteDisconnected, IncompleteRead, EOFError, gzip.BadGzipFile):
             if attempt < retries:
                 time.sleep(delay + attempt)
                 continue
-            return False
-    return False
+            return False, None
+    return False, None
+
+
+def parse_content_length(value: str | None) -> int | None:
+    try:
+        length = int(value or "")
+    except ValueError:
+        return None
+    return length if length >= 0 else None
 
 
 def normalize_url(url: str) -> str:
@@ -126,13 +170,17 @@ def normalize_url(url: str) -> str:
 
 
 def main() -> int:
-    if len(sys.argv) < 2:
+    # --force re-downloads targets that already exist (e.g. the corrupt list from
+    # verify-archive.py); the old file is only replaced once a download completes.
+    args = [arg for arg in sys.argv[1:] if arg != "--force"]
+    force = len(args) != len(sys.argv) - 1
+    if len(args) < 1:
         usage()
         return 1
 
-    root = Path(sys.argv[1]).resolve()
-    missing_path = Path(sys.argv[2]).resolve() if len(sys.argv) > 2 else root / "missing-wayback-urls.txt"
-    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    root = Path(args[0]).resolve()
+    missing_path = Path(args[1]).resolve() if len(args) > 1 else root / "missing-wayback-urls.txt"
+    delay = float(args[2]) if len(args) > 2 else 0.5
 
     if not root.is_dir():
         print(f"Archive root not found: {root}", file=sys.stderr)
@@ -156,6 +204,7 @@ def main() -> int:
         return (4, url)
 
     missing = sorted(missing, key=sort_key)
+    lengths = load_content_lengths(root)
     ok = 0
     skipped = 0
     failed = 0
@@ -175,26 +224,34 @@ def main() -> int:
             continue
 
         target = build_target_path(root, host, parsed.path or "/", parsed.query)
-        if target.exists():
+        if target.exists() and not force:
             skipped += 1
             continue
 
-        downloaded = download(line, target, delay)
+        downloaded, content_length = download(line, target, delay)
         if not downloaded:
             # For Jimdo file downloads, the live endpoint is often accessible even
             # when the site itself is behind bot protection.
             is_jimdo_download = host == "www.echecs92.fr" and "/app/download/" in (parsed.path or "")
             if is_jimdo_download or host in DIRECT_FALLBACK_HOSTS:
-                downloaded = download(original, target, delay)
+                downloaded, content_length = download(original, target, delay)
 
         if downloaded:
             ok += 1
+            rel = target.relative_to(root).as_posix()
+            # postprocess-archive.py rewrites HTML pages, so their length would go stale.
+            if content_length is None or target.suffix.lower() == ".html":
+                lengths.pop(rel, None)
+            else:
+                lengths[rel] = content_length
         else:
             failed += 1
 
         if idx == 1 or idx == total or idx % 25 == 0:
+            save_content_lengths(root, lengths)
             print(f"[{idx}/{total}] Downloaded: {ok}, skipped: {skipped}, failed: {failed}", flush=True)
 
+    save_content_lengths(root, lengths)
     print(f"Downloaded: {ok}, skipped: {skipped}, failed: {failed}", flush=True)
     return 0
 
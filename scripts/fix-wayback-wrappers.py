@@ -2,10 +2,12 @@
 from __future__ import annotations
 
 import gzip
+import importlib.util
 import re
 import sys
 import time
 from pathlib import Path
+from types import ModuleType
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
@@ -24,21 +26,38 @@ UA = (
 )
 
 
+def load_sibling(filename: str) -> ModuleType:
+    # The archive scripts are not importable by name (dashes).
+    path = Path(__file__).resolve().with_name(filename)
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Content-Length records written by fetch-missing-wayback.py; entries for files
+# we replace no longer apply.
+fetch_missing = load_sibling("fetch-missing-wayback.py")
+
+
 def usage() -> None:
     print("Usage: fix-wayback-wrappers.py <archive_root> [delay_seconds]", file=sys.stderr)
 
 
+def head_looks_like_html(head: bytes) -> bool:
+    if WRAPPER_HEAD_RE.search(head):
+        return True
+    stripped = head.lstrip().lower()
+    return stripped.startswith(b"<!doctype html") or stripped.startswith(b"<html")
+
+
 def is_wayback_wrapper(path: Path) -> bool:
     try:
         with open(path, "rb") as f:
             head = f.read(4096)
     except OSError:
         return False
-
-    if WRAPPER_HEAD_RE.search(head):
-        return True
-    stripped = head.lstrip()
-    return stripped.startswith(b"<!DOCTYPE html") or stripped.startswith(b"<html")
+    return head_looks_like_html(head)
 
 
 def extract_wayback_info(path: Path) -> tuple[str, str] | None:
@@ -111,8 +130,7 @@ def looks_like_html(path: Path) -> bool:
             head = f.read(512)
     except OSError:
         return True
-    stripped = head.lstrip()
-    return WRAPPER_HEAD_RE.search(head) is not None or stripped.startswith(b"<!DOCTYPE html") or stripped.startswith(b"<html")
+    return head_looks_like_html(head)
 
 
 def fix_one(path: Path, delay: float) -> bool:
@@ -162,6 +180,8 @@ def main() -> int:
         if is_wayback_wrapper(path):
             candidates.append(path)
 
+    lengths = fetch_missing.load_content_lengths(root)
+
     fixed = 0
     failed = 0
     total = len(candidates)
@@ -169,11 +189,15 @@ def main() -> int:
         ok = fix_one(path, delay)
         if ok:
             fixed += 1
+            lengths.pop(path.relative_to(root).as_posix(), None)
         else:
             failed += 1
         if idx == 1 or idx == total or idx % 10 == 0:
             print(f"[{idx}/{total}] Fixed: {fixed}, failed: {failed}", flush=True)
 
+    if fixed and (root / fetch_missing.CONTENT_LENGTHS_NAME).is_file():
+        fetch_missing.save_content_lengths(root, lengths)
+
     print(f"Fixed: {fixed}, failed: {failed}", flush=True)
     return 0
 
@@ -85,4 +85,14 @@ fi
 # Some assets (e.g. .jpg/.css) occasionally get saved as Wayback HTML wrapper pages.
 # Replace those wrappers with the real resource payloads.
 python3 scripts/fix-wayback-wrappers.py "$out_dir" 0.2 || true
+
+# Verify every asset (checkpointed: reruns only check new/changed files) and
+# re-fetch truncated or corrupt ones. Corrupt files stay in place until --force
+# has a complete replacement, so a failed re-fetch is retried on the next run.
+python3 scripts/verify-archive.py "$out_dir" || true
+corrupt_file="$out_dir/corrupt-wayback-urls.txt"
+if [[ -s "$corrupt_file" ]]; then
+  echo "Re-fetching corrupt resources (see $corrupt_file)..." >&2
+  python3 scripts/fetch-missing-wayback.py --force "$out_dir" "$corrupt_file" 0.2 || true
+fi
 python3 scripts/postprocess-archive.py "$out_dir" "$archive_domain"
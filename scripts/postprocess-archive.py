@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 import sys
+import unicodedata
+from html.parser import HTMLParser
 from pathlib import Path
 import shutil
 from urllib.parse import quote, unquote, urlparse
@@ -64,6 +68,44 @@ ARCHIVE_HOSTS = {
 }
 
 
+# Static search index (written under <archive_root>/search/).
+SEARCH_DIR_NAME = "search"
+SEARCH_ASSETS_DIR = Path(__file__).resolve().parent / "archive-search"
+SEARCH_INDEX_VERSION = 1
+SEARCH_PREFIX_LEN = 2
+SEARCH_SNIPPET_LEN = 200
+# Doc records (url, title, snippet) are split by id so the client only fetches
+# the chunks holding the results it displays.
+SEARCH_DOCS_PER_CHUNK = 100
+# Build-only cache (per-page hashes and terms), kept out of the published search/ dir.
+SEARCH_CACHE_NAME = "search-index-cache.json"
+SEARCH_MIN_TOKEN_LEN = 2
+
+SEARCH_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer"}
+# Jimdo navigation/sidebar blocks repeat on every page and would drown real content.
+SEARCH_SKIP_CLASS_RE = re.compile(r"(?:^|\s)(?:j-nav|j-meta-links|j-admin-links|cc-nav|archive-search-link)", re.IGNORECASE)
+SEARCH_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+# Plain link at the top of the page flow (no overlay covering the Jimdo layout).
+SEARCH_LINK_HTML = (
+    '<p class="archive-search-link" style="margin:0;padding:.25em 1em;text-align:right;font:14px sans-serif">'
+    '<a href="/search/">Rechercher dans l\'archive</a></p>\n'
+)
+# Also matches the fixed-position <a> injected by earlier builds.
+SEARCH_LINK_RE = re.compile(r'\n?<(p|a) class="archive-search-link"[^>]*>.*?</\1>\n?', re.DOTALL)
+
+SEARCH_TOKEN_RE = re.compile(r"[a-z0-9]+")
+SEARCH_STOPWORDS = {
+    "au", "aux", "ce", "ces", "dans", "de", "des", "du", "en", "et", "il", "la", "le", "les",
+    "leur", "mais", "ne", "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses",
+    "son", "sur", "un", "une", "vos", "votre", "nous", "vous", "est", "sont", "avec", "www",
+    "http", "https", "com", "fr",
+}
+
+
 def usage() -> None:
     print("Usage: postprocess-archive.py <archive_root> <archive_domain>", file=sys.stderr)
 
@@ -103,14 +145,18 @@ def promote_site_root(root: Path) -> Path:
     return root
 
 
-def canonical_url(domain: str, html_path: Path, root: Path) -> str:
+def site_path(html_path: Path, root: Path) -> str:
     rel = html_path.relative_to(root).as_posix()
     if rel.endswith("index.html"):
         rel_dir = rel[: -len("index.html")].rstrip("/")
         if rel_dir:
-            return f"https://{domain}/{rel_dir}/"
-        return f"https://{domain}/"
-    return f"https://{domain}/{rel}"
+            return f"/{rel_dir}/"
+        return "/"
+    return f"/{rel}"
+
+
+def canonical_url(domain: str, html_path: Path, root: Path) -> str:
+    return f"https://{domain}{site_path(html_path, root)}"
 
 
 def inject_meta(html: str, domain: str, html_path: Path, root: Path) -> str:
@@ -130,6 +176,17 @@ def inject_meta(html: str, domain: str, html_path: Path, root: Path) -> str:
     return re.sub(r"(<head[^>]*>)", r"\1\n" + injection, html, count=1, flags=re.IGNORECASE)
 
 
+def inject_search_link(html: str) -> str:
+    html = SEARCH_LINK_RE.sub("", html)
+    return re.sub(
+        r"(<body[^>]*>)",
+        lambda match: match.group(1) + "\n" + SEARCH_LINK_HTML,
+        html,
+        count=1,
+        flags=re.IGNORECASE,
+    )
+
+
 def normalize_path(path: str) -> str:
     if not path.startswith("/"):
         path = "/" + path
@@ -253,14 +310,231 @@ def replace_direct_asset_urls(html: str, root: Path) -> str:
     return DIRECT_ASSET_URL_RE.sub(repl, html)
 
 
-def process_html(html_path: Path, root: Path, domain: str, missing_urls: set[str]) -> None:
+class SearchTextExtractor(HTMLParser):
+    # Collects <title> and the visible body text, skipping scripts and repeated
+    # navigation chrome. Skipped elements are tracked per tag name so nested
+    # elements of the same kind close the right block.
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title_parts: list[str] = []
+        self.text_parts: list[str] = []
+        self._in_title = False
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in SEARCH_VOID_TAGS:
+            return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag == "title":
+            self._in_title = True
+            return
+        classes = " ".join(value or "" for name, value in attrs if name in ("class", "id"))
+        if tag in SEARCH_SKIP_TAGS or (classes and SEARCH_SKIP_CLASS_RE.search(classes)):
+            self._skip_tag = tag
+            self._skip_depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth <= 0:
+                    self._skip_tag = None
+            return
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is not None:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+        else:
+            self.text_parts.append(data)
+
+
+def collapse_whitespace(value: str) -> str:
+    return " ".join(value.split())
+
+
+def extract_search_text(html: str) -> tuple[str, str]:
+    parser = SearchTextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Malformed markup: keep whatever was collected so far.
+        pass
+    return collapse_whitespace(" ".join(parser.title_parts)), collapse_whitespace(" ".join(parser.text_parts))
+
+
+def fold_accents(value: str) -> str:
+    # "Échecs" -> "echecs", "cœur" -> "coeur" (NFKD does not split the ligatures).
+    value = value.lower().replace("œ", "oe").replace("æ", "ae")
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(value: str) -> list[str]:
+    return [
+        token
+        for token in SEARCH_TOKEN_RE.findall(fold_accents(value))
+        if len(token) >= SEARCH_MIN_TOKEN_LEN and token not in SEARCH_STOPWORDS
+    ]
+
+
+def search_terms(title: str, text: str) -> dict[str, int]:
+    # Title words weigh more than body words when ranking results client-side.
+    terms: dict[str, int] = {}
+    for token in tokenize(title):
+        terms[token] = terms.get(token, 0) + 5
+    for token in tokenize(text):
+        terms[token] = terms.get(token, 0) + 1
+    return terms
+
+
+def shard_key(token: str) -> str:
+    return token[:SEARCH_PREFIX_LEN]
+
+
+class SearchIndex:
+    # Incremental builder: each page's terms are cached with a hash of its final
+    # HTML, so unchanged pages are not re-parsed on later runs. Doc ids are kept
+    # stable across runs so adding a page only touches the shards it appears in.
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.dir = root / SEARCH_DIR_NAME
+        self.cache_path = root / SEARCH_CACHE_NAME
+        self.pages: dict[str, dict] = {}
+        self.seen: set[str] = set()
+        self.reindexed = 0
+        try:
+            cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = None
+        if isinstance(cached, dict) and cached.get("version") == SEARCH_INDEX_VERSION:
+            pages = cached.get("pages")
+            self.pages = pages if isinstance(pages, dict) else {}
+
+    def add_page(self, html_path: Path, html: str) -> None:
+        rel = html_path.relative_to(self.root).as_posix()
+        self.seen.add(rel)
+        # Whitespace-insensitive: re-running inject_meta() shifts blank lines around.
+        digest = hashlib.sha1(collapse_whitespace(html).encode("utf-8")).hexdigest()
+        entry = self.pages.get(rel)
+        if entry and entry.get("hash") == digest:
+            return
+
+        title, text = extract_search_text(html)
+        doc_id = entry["id"] if entry else None
+        self.pages[rel] = {
+            "id": doc_id,
+            "hash": digest,
+            "url": site_path(html_path, self.root),
+            "title": title,
+            "snippet": text[:SEARCH_SNIPPET_LEN],
+            "terms": search_terms(title, text),
+        }
+        self.reindexed += 1
+
+    def write(self) -> None:
+        for rel in [rel for rel in self.pages if rel not in self.seen]:
+            del self.pages[rel]
+
+        used_ids = {entry["id"] for entry in self.pages.values() if entry.get("id") is not None}
+        next_id = max(used_ids, default=-1) + 1
+        for rel in sorted(self.pages):
+            if self.pages[rel].get("id") is None:
+                self.pages[rel]["id"] = next_id
+                next_id += 1
+
+        doc_chunks: dict[int, list[list[str] | None]] = {}
+        shards: dict[str, dict[str, list[list[int]]]] = {}
+        for entry in self.pages.values():
+            doc_id = entry["id"]
+            chunk = doc_chunks.setdefault(doc_id // SEARCH_DOCS_PER_CHUNK, [None] * SEARCH_DOCS_PER_CHUNK)
+            chunk[doc_id % SEARCH_DOCS_PER_CHUNK] = [entry["url"], entry["title"], entry["snippet"]]
+            for token, weight in entry["terms"].items():
+                shards.setdefault(shard_key(token), {}).setdefault(token, []).append([doc_id, weight])
+
+        shard_dir = self.dir / "shards"
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        for key, postings in shards.items():
+            for entries in postings.values():
+                entries.sort()
+            write_if_changed(shard_dir / f"{key}.json", compact_json(dict(sorted(postings.items()))))
+        remove_stale_json(shard_dir, set(shards))
+
+        docs_dir = self.dir / "docs"
+        docs_dir.mkdir(parents=True, exist_ok=True)
+        for number, chunk in doc_chunks.items():
+            while chunk and chunk[-1] is None:
+                chunk.pop()
+            write_if_changed(docs_dir / f"{number}.json", compact_json(chunk))
+        remove_stale_json(docs_dir, {str(number) for number in doc_chunks})
+
+        manifest = {
+            "version": SEARCH_INDEX_VERSION,
+            "prefixLength": SEARCH_PREFIX_LEN,
+            "minTokenLength": SEARCH_MIN_TOKEN_LEN,
+            "docsPerChunk": SEARCH_DOCS_PER_CHUNK,
+            "stopwords": sorted(SEARCH_STOPWORDS),
+            "shards": sorted(shards),
+        }
+        write_if_changed(self.dir / "index.json", compact_json(manifest))
+        write_if_changed(
+            self.cache_path,
+            compact_json({"version": SEARCH_INDEX_VERSION, "pages": dict(sorted(self.pages.items()))}),
+        )
+        # Older builds kept the cache inside search/, which is published.
+        (self.dir / "pages-cache.json").unlink(missing_ok=True)
+
+        for asset in ("index.html", "search.js"):
+            source = SEARCH_ASSETS_DIR / asset
+            if source.is_file():
+                write_if_changed(self.dir / asset, source.read_text(encoding="utf-8"))
+
+
+def remove_stale_json(directory: Path, keep: set[str]) -> None:
+    for stale in directory.glob("*.json"):
+        if stale.stem not in keep:
+            stale.unlink()
+
+
+def compact_json(payload: object) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_if_changed(path: Path, content: str) -> None:
+    # Leaves mtimes alone for unchanged shards so rsync/FTP deploys stay small.
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return
+    except OSError:
+        pass
+    path.write_text(content, encoding="utf-8")
+
+
+def process_html(
+    html_path: Path,
+    root: Path,
+    domain: str,
+    missing_urls: set[str],
+    search_index: SearchIndex | None = None,
+) -> None:
     text = html_path.read_text(encoding="utf-8", errors="ignore")
     text = WAYBACK_BLOCK_RE.sub("", text)
     text = ADMIN_LINKS_RE.sub("", text)
     text = replace_wayback_urls(text, root, missing_urls)
     text = replace_direct_asset_urls(text, root)
     text = inject_meta(text, domain, html_path, root)
+    text = inject_search_link(text)
     html_path.write_text(text, encoding="utf-8")
+    if search_index is not None:
+        search_index.add_page(html_path, text)
 
 
 def write_robots(root: Path) -> None:
@@ -285,8 +559,18 @@ def main() -> int:
         return 1
 
     missing_urls: set[str] = set()
+    search_index = SearchIndex(target_root)
+    search_dir = target_root / SEARCH_DIR_NAME
     for html_path in target_root.rglob("*.html"):
-        process_html(html_path, target_root, domain, missing_urls)
+        if search_dir in html_path.parents:
+            continue
+        process_html(html_path, target_root, domain, missing_urls, search_index)
+
+    search_index.write()
+    print(
+        f"Search index: {len(search_index.pages)} pages ({search_index.reindexed} re-indexed)",
+        file=sys.stderr,
+    )
 
     write_robots(target_root)
 
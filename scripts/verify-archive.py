@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import ModuleType
+from urllib.parse import urlparse
+
+
+def load_sibling(filename: str) -> ModuleType:
+    # The archive scripts are not importable by name (dashes); share their
+    # helpers instead of copying them so the checks cannot drift apart.
+    path = Path(__file__).resolve().with_name(filename)
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fetch_missing = load_sibling("fetch-missing-wayback.py")
+fix_wrappers = load_sibling("fix-wayback-wrappers.py")
+
+IMAGE_EXTS = fix_wrappers.IMAGE_EXTS
+TEXT_EXTS = fix_wrappers.TEXT_EXTS
+DOCUMENT_EXTS = {".pdf"}
+
+CHECKPOINT_NAME = "archive-verify.json"
+CORRUPT_LIST_NAME = "corrupt-wayback-urls.txt"
+# Generated by postprocess-archive.py, never fetched.
+SKIP_DIRS = {"search"}
+
+# Same fallback as mirror-jimdo-archive.sh when wayback-snapshot.txt is absent.
+FALLBACK_SNAPSHOT = "20251009182304"
+CHECKPOINT_EVERY = 500
+
+# End-of-data markers, searched only near the end of the file: linearized or
+# incrementally updated PDFs and JPEGs with an EXIF thumbnail also contain them
+# near the start. The windows still tolerate a little trailing data; PDF readers
+# look for %%EOF within the last 1024 bytes.
+END_MARKERS = {
+    ".jpg": (b"\xff\xd9", 4096),
+    ".jpeg": (b"\xff\xd9", 4096),
+    ".png": (b"IEND", 4096),
+    ".pdf": (b"%%EOF", 1024),
+}
+
+
+def usage() -> None:
+    print("Usage: verify-archive.py <archive_root> [workers]", file=sys.stderr)
+
+
+def load_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def check_image(ext: str, head: bytes, has_end_marker: bool) -> str | None:
+    # Header magic proves the payload is the right format; a missing end marker
+    # means the transfer was cut off mid-file.
+    if ext == ".svg":
+        return None if b"<svg" in head.lower() else "svg without <svg> element"
+    if ext in (".jpg", ".jpeg"):
+        if not head.startswith(b"\xff\xd8\xff"):
+            return "bad jpeg header"
+        return None if has_end_marker else "truncated jpeg"
+    if ext == ".png":
+        if not head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "bad png header"
+        return None if has_end_marker else "truncated png"
+    if ext == ".gif":
+        if not head.startswith((b"GIF87a", b"GIF89a")):
+            return "bad gif header"
+        return None
+    if ext == ".webp":
+        if not (head.startswith(b"RIFF") and head[8:12] == b"WEBP"):
+            return "bad webp header"
+        return None
+    if ext == ".ico":
+        if not head.startswith((b"\x00\x00\x01\x00", b"\x89PNG")):
+            return "bad ico header"
+        return None
+    return None
+
+
+def check_file(path: Path, content_length: int | None, previous: dict | None) -> dict:
+    stat = path.stat()
+    result = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": "", "error": None}
+
+    digest = hashlib.sha1()
+    head = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            if not head:
+                head = chunk[:4096]
+            digest.update(chunk)
+    result["sha1"] = digest.hexdigest()
+
+    # Only the mtime changed (e.g. touched or restored from the zip): the content
+    # already passed verification.
+    if previous and previous.get("sha1") == result["sha1"] and previous.get("size") == stat.st_size:
+        return result
+
+    ext = path.suffix.lower()
+    has_end_marker = False
+    if ext in END_MARKERS:
+        marker, window = END_MARKERS[ext]
+        with open(path, "rb") as f:
+            f.seek(max(0, stat.st_size - window))
+            has_end_marker = marker in f.read()
+
+    if content_length is not None and content_length != stat.st_size:
+        result["error"] = f"size {stat.st_size} != Content-Length {content_length}"
+    elif stat.st_size == 0:
+        result["error"] = "empty file"
+    elif ext in IMAGE_EXTS:
+        if ext != ".svg" and fix_wrappers.head_looks_like_html(head):
+            result["error"] = "html wrapper instead of image"
+        else:
+            result["error"] = check_image(ext, head, has_end_marker)
+    elif ext in TEXT_EXTS:
+        if fix_wrappers.head_looks_like_html(head):
+            result["error"] = "html wrapper instead of " + ext[1:]
+    elif ext in DOCUMENT_EXTS:
+        if not head.startswith(b"%PDF"):
+            result["error"] = "bad pdf header"
+        elif not has_end_marker:
+            result["error"] = "truncated pdf"
+    return result
+
+
+def guess_original_url(rel: str) -> str:
+    # Best-effort inverse of build_target_path() in fetch-missing-wayback.py;
+    # callers must check the round trip (wget's --adjust-extension names don't invert).
+    parts = rel.split("/")
+    host = "www.echecs92.fr"
+    if len(parts) > 1 and parts[0] in fetch_missing.ALLOWED_HOSTS:
+        host = parts.pop(0)
+
+    name = parts[-1]
+    query = ""
+    if "@" in name:
+        base, query = name.split("@", 1)
+        ext = os.path.splitext(base)[1]
+        if ext and query.endswith(ext):
+            query = query[: -len(ext)]
+        query = query.replace("%26", "&")
+        parts[-1] = base
+    elif name == "index.html":
+        parts[-1] = ""
+
+    # normalize_path() stores ":" as "%3A" on disk.
+    path = "/".join(parts).replace("%3A", ":")
+    url = f"https://{host}/{path}"
+    if query:
+        url += "?" + query
+    return url
+
+
+def refetch_url(root: Path, path: Path, snapshot: str) -> str | None:
+    # Wayback wrappers carry their own capture URL/timestamp; prefer those.
+    timestamp, original = snapshot, None
+    info = fix_wrappers.extract_wayback_info(path)
+    if info:
+        timestamp, original = info
+    else:
+        original = guess_original_url(path.relative_to(root).as_posix())
+
+    # Only queue URLs that fetch-missing-wayback.py would write back to this exact file.
+    parsed = urlparse(original)
+    if parsed.netloc not in fetch_missing.ALLOWED_HOSTS:
+        return None
+    target = fetch_missing.build_target_path(root, parsed.netloc, parsed.path or "/", parsed.query)
+    if target != path:
+        return None
+    return f"http://web.archive.org/web/{timestamp}id_/{original}"
+
+
+def collect_candidates(root: Path) -> list[tuple[Path, str]]:
+    exts = IMAGE_EXTS | TEXT_EXTS | DOCUMENT_EXTS
+    candidates: list[tuple[Path, str]] = []
+    for path in root.rglob("*"):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(root).as_posix()
+        if rel.split("/", 1)[0] in SKIP_DIRS:
+            continue
+        # HTML pages are rewritten by postprocess-archive.py: nothing to check.
+        if path.suffix.lower() in exts:
+            candidates.append((path, rel))
+    return sorted(candidates, key=lambda item: item[1])
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        usage()
+        return 1
+
+    root = Path(sys.argv[1]).resolve()
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else min(32, (os.cpu_count() or 1) * 4)
+
+    if not root.is_dir():
+        print(f"Archive root not found: {root}", file=sys.stderr)
+        return 1
+
+    checkpoint_path = root / CHECKPOINT_NAME
+    checkpoint = load_json(checkpoint_path)
+    recorded = fetch_missing.load_content_lengths(root)
+    snapshot = FALLBACK_SNAPSHOT
+    try:
+        snapshot = (root / "wayback-snapshot.txt").read_text(encoding="utf-8").strip() or snapshot
+    except OSError:
+        pass
+
+    candidates = collect_candidates(root)
+    present = {rel for _, rel in candidates}
+    # Forget files that disappeared since the last run.
+    checkpoint = {rel: entry for rel, entry in checkpoint.items() if rel in present}
+
+    # Checkpointed files are only re-checked when their size or mtime changed (and
+    # only re-validated when their sha1 changed too). Corrupt files are never
+    # checkpointed, so they are re-checked (and re-queued) until a download replaces them.
+    pending: list[tuple[Path, str, dict | None]] = []
+    for path, rel in candidates:
+        entry = checkpoint.get(rel)
+        stat = path.stat()
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            continue
+        pending.append((path, rel, entry))
+
+    corrupt: list[str] = []
+    checked = 0
+    total = len(pending)
+    print(f"Verifying {total} of {len(candidates)} files ({workers} workers)...", flush=True)
+
+    def run(item: tuple[Path, str, dict | None]) -> tuple[str, dict | None]:
+        path, rel, previous = item
+        try:
+            return rel, check_file(path, recorded.get(rel), previous)
+        except OSError:
+            return rel, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel, result in pool.map(run, pending):
+            checked += 1
+            if result is None:
+                checkpoint.pop(rel, None)
+            elif result["error"]:
+                corrupt.append(rel)
+                checkpoint.pop(rel, None)
+                print(f"Corrupt: {rel} ({result['error']})", flush=True)
+            else:
+                checkpoint[rel] = result
+            if checked % CHECKPOINT_EVERY == 0:
+                save_json(checkpoint_path, checkpoint)
+                print(f"[{checked}/{total}] Checked, corrupt: {len(corrupt)}", flush=True)
+
+    save_json(checkpoint_path, checkpoint)
+
+    # Corrupt files stay in place: `fetch-missing-wayback.py --force` downloads to a
+    # temp file and only replaces them once a complete copy has arrived.
+    urls: list[str] = []
+    unmapped = 0
+    for rel in corrupt:
+        url = refetch_url(root, root / rel, snapshot)
+        if url is None:
+            unmapped += 1
+            print(f"Not queued (no source URL maps back to this file): {rel}", flush=True)
+            continue
+        urls.append(url)
+
+    corrupt_path = root / CORRUPT_LIST_NAME
+    corrupt_path.write_text("".join(url + "\n" for url in sorted(urls)), encoding="utf-8")
+
+    print(
+        f"Checked: {checked}, skipped (unchanged): {len(candidates) - total}, "
+        f"corrupt: {len(corrupt)}, queued: {len(urls)}, not queued: {unmapped}",
+        flush=True,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())